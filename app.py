@@ -1,21 +1,82 @@
 from flask import Flask, jsonify, send_from_directory, request as flask_request
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
+from flask_compress import Compress
+import orjson
 import time
 import math
+import random
+import functools
+import heapq
 import requests as req_lib
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
 import sqlite3
+import queue
 import psutil
 from dotenv import load_dotenv
-import joblib
-import pandas as pd
+import numpy as np
 import threading
-from datetime import datetime, timezone
+import logging
+import logging.handlers
+import sys
+import atexit
+from datetime import datetime, timedelta, timezone
+from dataclasses import dataclass, replace, asdict
 
 load_dotenv()  # Load environment variables before initializing classes
 
+# Request and worker threads only enqueue log records; a single listener thread
+# does the blocking stderr writes
+_log_queue = queue.SimpleQueue()
+logger = logging.getLogger("dcn")
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+logger.propagate = False
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler(sys.stderr))
+_log_listener.start()
+atexit.register(_log_listener.stop)  # Drain pending records on shutdown
+
+
+class OrjsonProvider(JSONProvider):
+    """Serializes jsonify() responses with orjson, writing bytes straight into the response."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY), mimetype="application/json"
+        )
+
+
 app = Flask(__name__)
+# Browsers may reuse index.html (and /static assets) for a minute before revalidating
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 60
+app.json = OrjsonProvider(app)
 CORS(app)  # Enable CORS for all routes
+# gzip/br JSON and index.html responses; registered by hand below so conditional
+# requests can be re-evaluated after compression
+app.config['COMPRESS_REGISTER'] = False
+compress = Compress(app)
+
+
+@app.after_request
+def compress_response(response):
+    """
+    Compresses through Flask-Compress, then re-checks If-None-Match / If-Modified-Since:
+    compression rewrites the ETag to "<etag>:gzip", which the 304 check that ran inside
+    send_from_directory could not have matched.
+    """
+    response = compress.after_request(response)
+    if response.status_code == 200 and 'ETag' in response.headers:
+        response.make_conditional(flask_request)
+    return response
 
 RADIO_CAPACITY_MBPS = {
     "GSM": 0.2,
@@ -25,6 +86,159 @@ RADIO_CAPACITY_MBPS = {
     "NR": 600.0
 }
 
+# (state, ftp_prio) -> (bw_voip, bw_http, bw_ftp, q_voip, q_http, q_ftp)
+# "low": balanced priorities (5, 4, 3); "med": moderate VoIP preference (6, 3, 2)
+# with the user's FTP priority shifting 10% between HTTP and FTP.
+# "high" depends on the VoIP reservation; see build_qos_table.
+QOS_ALLOCATION = {
+    ("low", "low"): (25, 45, 30, 10, 30, 60),
+    ("low", "std"): (25, 45, 30, 10, 30, 60),
+    ("low", "high"): (25, 45, 30, 10, 30, 60),
+    ("med", "low"): (40, 45, 15, 20, 40, 40),
+    ("med", "std"): (40, 35, 25, 20, 40, 40),
+    ("med", "high"): (40, 25, 35, 20, 40, 40),
+}
+
+# Columns 0-5 of the sample ring hold voip, http, ftp, delay, throughput, loss;
+# column 6 holds the ML state encoded through STATE_CODES
+SAMPLE_RING_SIZE = 64
+STATE_NAMES = ("low", "med", "high")
+STATE_CODES = {name: code for code, name in enumerate(STATE_NAMES)}
+
+# Interface name fragments preferred when attributing traffic (Wi-Fi or Data first)
+PREFERRED_INTERFACES = ('wi-fi', 'wifi', 'cellular', 'mobile data', 'ethernet')
+# Seconds between refreshes of the traffic monitor's interface list
+NIC_REFRESH_INTERVAL = 60
+
+# Seconds an idle /api/stream waits before sending a keepalive comment
+STREAM_KEEPALIVE = 15
+# Concurrent /api/stream clients per process. Each holds a gthread worker thread while
+# open, so keep this well under gunicorn's threads (16) to leave room for requests
+STREAM_MAX_CLIENTS = 4
+
+# Lowering virtual capacity to 25 Mbps for high sensitivity to Wi-Fi/Mobile browsing
+VIRTUAL_CAPACITY_MBPS = 25.0
+
+# Shown while the process monitor has nothing yet (and always on Vercel); never mutated
+DEFAULT_PROCESSES = ["System Kernel", "Network Interface", "DCN Controller"]
+
+# Rows of 4 uniforms pre-drawn per thread for the metrics noise (see _randoms). Noise is
+# only drawn on a metrics memo miss, so a small block amortises the numpy call without
+# parking hundreds of KB of floats on each of the 16 request threads
+RANDOM_BLOCK_ROWS = 64
+
+# Seconds a serialized /api/status body is reused; traffic samples only change every 2s
+STATUS_CACHE_TTL = 0.5
+
+# Keep-alive session for OpenCelliD so repeat lookups reuse the TLS connection
+ocid_session = req_lib.Session()
+# One quick retry covers connections the server dropped while idle in the pool. Read
+# timeouts are not retried, so a slow OpenCelliD costs at most one 15s wait
+ocid_session.mount('https://', HTTPAdapter(
+    pool_connections=4, pool_maxsize=16,
+    max_retries=Retry(total=1, read=0, backoff_factor=0.2)
+))
+
+# Single shared INSERT text: sqlite3 keeps compiled statements per connection keyed by
+# the exact SQL string, so pooled connections reuse the prepared statement
+LOG_INSERT_SQL = (
+    "INSERT INTO network_logs "
+    "(timestamp, time_str, voip_kbps, http_mbps, ftp_mbps, delay_ms, throughput_gbps, packet_loss_pct, state) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+# Newest-first dataset read, row count bound as a parameter so the text (and its
+# cached statement) stays identical across requests
+DATASET_SELECT_SQL = (
+    "SELECT timestamp, time_str AS time, voip_kbps AS voip, http_mbps AS http, "
+    "ftp_mbps AS ftp, delay_ms AS delay, throughput_gbps AS throughput, "
+    "packet_loss_pct AS loss, state "
+    "FROM network_logs ORDER BY timestamp DESC LIMIT ?"
+)
+DATASET_ROW_LIMIT = 1000
+
+# Rolling retention: rows older than LOG_RETENTION_DAYS are deleted by the writer at most
+# once per LOG_PRUNE_INTERVAL seconds (a range delete on the timestamp index)
+LOG_RETENTION_DAYS = 30
+LOG_PRUNE_INTERVAL = 3600
+LOG_PRUNE_SQL = "DELETE FROM network_logs WHERE timestamp < ?"
+
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    """QoS controller settings. Immutable: update_config publishes a replaced copy."""
+    voip_alloc: int = 50
+    threshold: float = 0.4
+    ftp_prio: str = "std"
+
+
+def build_qos_table(config):
+    """Resolves the state -> QoS allocation tuple for one config; rebuilt only on config change."""
+    ftp_prio = config.ftp_prio
+    table = {
+        state: QOS_ALLOCATION.get((state, ftp_prio), QOS_ALLOCATION[(state, "std")])
+        for state in ("low", "med")
+    }
+    # Strong VoIP protection (8, 2, 1) — scales with the user's VoIP reservation
+    bw_voip = max(60, config.voip_alloc)
+    rem = 100 - bw_voip
+    bw_http = int(rem * 0.7)
+    table["high"] = (bw_voip, bw_http, rem - bw_http, 50, 30, 20)
+    return table
+
+
+def export_tree(tree, classes):
+    """
+    Flattens a fitted sklearn tree_ into plain lists for walk_tree. Each leaf stores
+    its (class_label, probability) so prediction ends in a single list lookup.
+    """
+    left = tree.children_left.tolist()
+    right = tree.children_right.tolist()
+    leaves = [None] * tree.node_count
+    for node in range(tree.node_count):
+        if left[node] == -1:
+            dist = tree.value[node][0]
+            idx = int(dist.argmax())
+            leaves[node] = (str(classes[idx]), float(dist[idx] / dist.sum()))
+    return tree.feature.tolist(), tree.threshold.tolist(), left, right, leaves
+
+
+def walk_tree(tree, x):
+    """Returns (class_label, probability) for feature tuple x on an export_tree() result."""
+    feature, threshold, left, right, leaves = tree
+    node = 0
+    while left[node] != -1:
+        node = left[node] if x[feature[node]] <= threshold[node] else right[node]
+    return leaves[node]
+
+
+# Rows spanning the low/med/high regions (load, delay, queue, arrival) used to check an
+# exported tree against the estimator it came from
+TREE_PROBE_ROWS = np.array([
+    [0.01, 5.0, 0, 1],
+    [10.0, 10.0, 5, 1000],
+    [35.0, 20.0, 60, 4200],
+    [60.0, 50.0, 100, 5000],
+    [75.0, 80.0, 300, 9000],
+    [95.0, 120.0, 400, 12000],
+], dtype=np.float32)
+
+
+def tree_export_matches(tree, model):
+    """True when walk_tree reproduces model.predict_proba (class and probability) on the probe rows."""
+    probs = model.predict_proba(TREE_PROBE_ROWS)
+    for row, row_probs in zip(TREE_PROBE_ROWS.tolist(), probs):
+        idx = int(row_probs.argmax())
+        state, prob = walk_tree(tree, row)
+        if state != str(model.classes_[idx]) or abs(prob - float(row_probs[idx])) > 1e-6:
+            return False
+    return True
+
+
+def clock_label(ts):
+    """HH:MM:SS local-time label for an alert; formatted only when an alert fires."""
+    return "%02d:%02d:%02d" % time.localtime(ts)[3:6]
+
 
 def clamp(value, lower, upper):
     return max(lower, min(upper, value))
@@ -81,32 +295,96 @@ def estimate_tower_traffic(cell, nearby_count):
     }
 
 
+def derive_link_features(total_load, arrival_noise, jitter, queue_noise):
+    """
+    Pure numeric core of the per-request simulation. Random draws are passed in
+    so this stays a side-effect-free function of its float inputs.
+    Returns (voip_kbps, http_mbps, ftp_mbps, arrival_rate, utilization_ratio, base_delay, queue_length).
+    """
+    # Distribute real load proportionally into our standard traffic bins for UI
+    if total_load < 1.0:
+        voip_kbps = max(20, total_load * 1000 * 0.4)
+        http_mbps = max(0.1, total_load * 0.5)
+        ftp_mbps = max(0.0, total_load * 0.1)
+    else:
+        voip_kbps = max(50, total_load * 1000 * 0.1)
+        http_mbps = max(0.5, total_load * 0.7)
+        ftp_mbps = max(0.1, total_load * 0.2)
+
+    # Arrival rate scales with total load
+    arrival_rate = int(total_load * 120 + arrival_noise)
+
+    # Base delay increases exponentially as real load approaches arbitrary capacity
+    utilization_ratio = min(0.99, total_load / VIRTUAL_CAPACITY_MBPS)
+    # Add natural jitter even at low load
+    base_delay = (5.0 / (1.0 - utilization_ratio)) + (jitter if total_load > 0 else 0)
+
+    # Active Queue activity (starting at 1 Mbps - typical web browsing)
+    if total_load > 0.1:
+        queue_length = 5 + int(max(0, (total_load - 1.0) * 20)) + queue_noise
+    else:
+        queue_length = 0
+    queue_length = max(0, queue_length)
+
+    return voip_kbps, http_mbps, ftp_mbps, arrival_rate, utilization_ratio, base_delay, queue_length
+
+
+def adaptive_performance(state, total_load, base_delay, utilization_ratio):
+    """
+    Compares the ML-adaptive scheduler with plain FIFO for one reading.
+    Returns (final_delay, final_tput, packet_loss, fifo_delay, fifo_loss, fifo_tput).
+    """
+    # Baseline (FIFO) metrics
+    fifo_delay = base_delay
+    fifo_loss = 0.05 + (utilization_ratio ** 2) * 10.0 if utilization_ratio > 0.4 else 0.01
+    fifo_tput = total_load * (1.0 - fifo_loss/100.0)
+
+    # ML-Adaptive metrics
+    if state == "high":
+        # Improved protection saves time-sensitive traffic (VoIP)
+        final_delay = base_delay * 0.75
+        packet_loss = fifo_loss * 0.6
+    elif state == "med":
+        final_delay = base_delay * 0.85
+        packet_loss = fifo_loss * 0.4
+    else:
+        final_delay = base_delay * 0.95
+        packet_loss = fifo_loss * 0.2
+
+    final_tput = total_load * (1.0 - packet_loss/100.0)
+    return final_delay, final_tput, packet_loss, fifo_delay, fifo_loss, fifo_tput
+
+
 # Simulation State
 class NetworkState:
     def __init__(self):
         self.phase = 0.0
         self.last_update = time.time()
-        self.config = {
-            "voip_alloc": 50,
-            "threshold": 0.4,
-            "ftp_prio": "std"
-        }
+        self.config = Config()
         self.last_log_time = 0
         self.log_interval = 10 # Log every 10 seconds
         self.last_state = "low"
         self.on_vercel = os.environ.get('VERCEL', '') == '1'
-        self.active_interface = "Vercel Cloud" if self.on_vercel else "Scanning..."
+        # Config is copy-on-write: update_config publishes a replaced Config under config_lock,
+        # readers just grab the current reference
+        self.config_lock = threading.Lock()
+        self._qos_table = build_qos_table(self.config)
+        # Bumped on every update_config; part of the metrics memo key
+        self.config_version = 0
         
         # Real Traffic Baseline
         self.capacity_mbps = 100.0
-        self.current_load_mbps = 0.5 if self.on_vercel else 0.01 
-        if not self.on_vercel:
-            try:
-                self.last_net_io = psutil.net_io_counters(pernic=True)
-            except Exception:
-                self.last_net_io = {}
+        # Immutable (load_mbps, sent_mbps, recv_mbps, interface) published by the traffic
+        # monitor with a single attribute store, so requests read it without locking
+        if self.on_vercel:
+            self._traffic_snapshot = (0.5, 0.2, 0.3, "Vercel Cloud")
         else:
-            self.last_net_io = {}
+            self._traffic_snapshot = (0.01, 0.0, 0.0, "Scanning...")
+        # Bumped after every published snapshot; keys the metrics memo, so a repeated
+        # load reading (e.g. an idle host pinned at the floor) still counts as a new sample
+        self._sample_seq = 0
+        # Bound once so the 2s sampling loop skips the module attribute lookup
+        self._net_io = psutil.net_io_counters
         
         # Use /tmp for DB on Vercel (read-only FS); fall back to project dir locally
         import tempfile
@@ -114,18 +392,70 @@ class NetworkState:
             self.db_path = os.path.join(tempfile.gettempdir(), "network_logs.db")
         else:
             self.db_path = "network_logs.db"
+        # Reuse SQLite connections across requests instead of reopening the file each time
+        self.db_pool_size = 8
+        self.db_pool = queue.LifoQueue(maxsize=self.db_pool_size)
+        # Pending log rows; a writer thread drains them into SQLite off the sampling path
+        self._log_q = queue.Queue(maxsize=1000)
+        # Monotonic time of the next retention prune; 0 prunes on the first write
+        self._next_prune = 0.0
+        # Struct-of-arrays ring of monitor samples (one row per 2s tick, one column per
+        # logged metric) so each log row is a window average instead of a single reading
+        self._ring = np.zeros((SAMPLE_RING_SIZE, 7), dtype=np.float64)
+        self._ring_count = 0
+        self._ring_logged = 0
+        # ((sample_seq, config_version), derived tuple) memo of get_current_metrics' numeric core
+        self._metrics_memo = (None, None)
+        # (monotonic time, serialized JSON) of the last /api/status response
+        self._status_cache = (0.0, None)
         self._init_db()
         
         # Load Decision Tree Model
         try:
-            self.model = joblib.load('traffic_model.joblib')
-            print("ML Model loaded successfully")
+            import joblib  # Deferred: only needed once, at model load
+            # Read-only mmap: array-backed estimators are paged in from the file, not copied
+            self.model = joblib.load('traffic_model.joblib', mmap_mode='r')
+            # The model was fit on a DataFrame; drop the stored names so predicting on a
+            # plain ndarray doesn't trigger sklearn's feature-name warning on every call
+            if hasattr(self.model, 'feature_names_in_'):
+                del self.model.feature_names_in_
+            self._classes = getattr(self.model, 'classes_', None)
+            # Export the fitted tree to plain lists: one traversal yields both the class and
+            # its probability, with no sklearn validation or ndarray allocation per call
+            tree = getattr(self.model, 'tree_', None)
+            self._tree = export_tree(tree, self._classes) if tree is not None else None
+            if self._tree is not None and not tree_export_matches(self._tree, self.model):
+                # Never serve a direct path that disagrees with sklearn; use predict_proba
+                logger.error("Exported tree disagrees with predict_proba; using the estimator")
+                self._tree = None
+            if self._tree is not None:
+                # walk_tree needs nothing else from sklearn; release the estimator
+                self.model = None
+            elif hasattr(self.model, 'n_jobs'):
+                # Single-row inference never benefits from joblib parallelism
+                self.model.n_jobs = 1
+            logger.info("ML Model loaded successfully")
         except Exception as e:
-            print(f"Error loading model: {e}")
+            logger.error("Error loading model: %s", e)
             self.model = None
+            self._tree = None
+
+        # Guards the small read-modify-write fields (last_log_time, last_state) only
+        self.lock = threading.Lock()
+        # Per-thread scratch buffers (e.g. the 1x4 ML feature row) reused across requests
+        self._local = threading.local()
+        # PCG64 generator; its bit generator is internally locked, so threads can share it
+        self._rng = np.random.default_rng()
 
-        # Thread safety for shared state
-        self.lock = threading.RLock()
+        # Process scans are expensive; a background thread refreshes this list and
+        # requests only read the reference (rebinding a list attribute is atomic)
+        self.procs_interval = 5.0
+        self._active_processes = []
+
+        # Set by shutdown(); background loops wait on it instead of sleeping
+        self._stop = threading.Event()
+        # Notified after every traffic sample; /api/stream generators wait on it
+        self._sample_cond = threading.Condition()
 
         # Background threads only make sense in a long-running process (not Vercel serverless)
         if not self.on_vercel:
@@ -133,79 +463,126 @@ class NetworkState:
             self.bg_thread.start()
             self.traffic_thread = threading.Thread(target=self._traffic_monitor, daemon=True)
             self.traffic_thread.start()
-            print("Background Threads (Logger & Traffic) started")
+            self.writer_thread = threading.Thread(target=self._log_writer, daemon=True)
+            self.writer_thread.start()
+            self.procs_thread = threading.Thread(target=self._process_monitor, daemon=True)
+            self.procs_thread.start()
+            atexit.register(self.shutdown)
+            logger.info("Background Threads (Logger, Writer, Traffic & Processes) started")
         else:
-            print("Vercel environment detected — background threads disabled")
+            logger.info("Vercel environment detected — background threads disabled")
 
     def _traffic_monitor(self):
         """Continuously samples network IO every 2 seconds to calculate a stable Mbps rate."""
-        while True:
+        # Rolling snapshot: each iteration reads the counters once and diffs against the
+        # previous read; monotonic time keeps dt positive across wall-clock adjustments.
+        # The baseline is taken here, next to t1, so the first dt covers exactly its bytes
+        try:
+            io1 = self._net_io(pernic=True, nowrap=True)
+        except Exception as e:
+            logger.error("Error reading NIC counters: %s", e)
+            io1 = {}
+        t1 = time.monotonic()
+        nics_at = None
+        while not self._stop.wait(2):
             try:
-                t1 = time.time()
-                io1 = psutil.net_io_counters(pernic=True)
-                time.sleep(2)
-                t2 = time.time()
-                io2 = psutil.net_io_counters(pernic=True)
+                t2 = time.monotonic()
+                # Interface list changes rarely; refresh it on a slow cadence
+                if nics_at is None or t2 - nics_at >= NIC_REFRESH_INTERVAL:
+                    preferred_nics, fallback_nics = self._candidate_nics()
+                    nics_at = t2
+                # nowrap keeps the per-NIC counters monotonic across 32-bit wraps on
+                # long-running hosts; pernic is needed to pick out the active interface
+                io2 = self._net_io(pernic=True, nowrap=True)
                 
                 dt = t2 - t1
                 
                 # Filter for Wi-Fi or Data (Cellular) interfaces primarily
                 sent_bytes = 0
                 recv_bytes = 0
-                preferred_interfaces = ['wi-fi', 'wifi', 'cellular', 'mobile data', 'ethernet']
                 
                 # Check for activity on preferred interfaces
                 active_nics = []
-                for nic, stats1 in io1.items():
-                    if any(pref in nic.lower() for pref in preferred_interfaces):
-                        if nic in io2:
-                            stats2 = io2[nic]
-                            s_diff = stats2.bytes_sent - stats1.bytes_sent
-                            r_diff = stats2.bytes_recv - stats1.bytes_recv
-                            if s_diff > 0 or r_diff > 0:
-                                sent_bytes += s_diff
-                                recv_bytes += r_diff
-                                active_nics.append(nic)
+                for nic in preferred_nics:
+                    stats1, stats2 = io1.get(nic), io2.get(nic)
+                    if stats1 and stats2:
+                        s_diff = stats2.bytes_sent - stats1.bytes_sent
+                        r_diff = stats2.bytes_recv - stats1.bytes_recv
+                        if s_diff > 0 or r_diff > 0:
+                            sent_bytes += s_diff
+                            recv_bytes += r_diff
+                            active_nics.append(nic)
                 
                 # Fallback: if no hardware nics show activity, check everything else except loopback
                 if (sent_bytes + recv_bytes) == 0:
-                    for nic, stats1 in io1.items():
-                        if 'loopback' not in nic.lower() and 'pseudo' not in nic.lower():
-                            if nic in io2:
-                                stats2 = io2[nic]
-                                s_diff = stats2.bytes_sent - stats1.bytes_sent
-                                r_diff = stats2.bytes_recv - stats1.bytes_recv
-                                sent_bytes += s_diff
-                                recv_bytes += r_diff
-                                if (s_diff + r_diff) > 0: active_nics.append(nic)
-
-                with self.lock:
-                    self.current_sent_mbps = (sent_bytes * 8) / (dt * 1000000)
-                    self.current_recv_mbps = (recv_bytes * 8) / (dt * 1000000)
-                    self.current_load_mbps = self.current_sent_mbps + self.current_recv_mbps
-                    self.active_interface = active_nics[0] if active_nics else "Auto-Select"
-                    # Smoothly decay if 0, but keep at least a tiny baseline
-                    self.current_load_mbps = max(0.01, self.current_load_mbps)
+                    for nic in fallback_nics:
+                        stats1, stats2 = io1.get(nic), io2.get(nic)
+                        if stats1 and stats2:
+                            s_diff = stats2.bytes_sent - stats1.bytes_sent
+                            r_diff = stats2.bytes_recv - stats1.bytes_recv
+                            sent_bytes += s_diff
+                            recv_bytes += r_diff
+                            if (s_diff + r_diff) > 0: active_nics.append(nic)
+
+                sent_mbps = (sent_bytes * 8) / (dt * 1000000)
+                recv_mbps = (recv_bytes * 8) / (dt * 1000000)
+                # Smoothly decay if 0, but keep at least a tiny baseline
+                load_mbps = max(0.01, sent_mbps + recv_mbps)
+                interface = active_nics[0] if active_nics else "Auto-Select"
+                self._traffic_snapshot = (load_mbps, sent_mbps, recv_mbps, interface)
+                self._sample_seq += 1
+                io1, t1 = io2, t2
+                self._record_sample()
+                # Wake /api/stream subscribers
+                with self._sample_cond:
+                    self._sample_cond.notify_all()
                     
             except Exception as e:
-                print(f"Error in traffic monitor: {e}")
-                time.sleep(5)
+                logger.error("Error in traffic monitor: %s", e)
+                self._stop.wait(5)
+
+    def wait_for_sample(self, timeout):
+        """Blocks until the traffic monitor publishes its next sample; False on timeout or shutdown."""
+        with self._sample_cond:
+            return self._sample_cond.wait(timeout) and not self._stop.is_set()
+
+    def _candidate_nics(self):
+        """
+        Interfaces worth diffing, as (preferred, fallback) name lists: preferred are the
+        Wi-Fi/cellular/ethernet ones, fallback is every non-loopback interface. Down
+        interfaces are skipped since their counters cannot move.
+        """
+        try:
+            stats = psutil.net_if_stats()
+        except Exception as e:
+            logger.error("Error reading interface stats: %s", e)
+            stats = {}
+        preferred, fallback = [], []
+        for nic, st in stats.items():
+            name = nic.lower()
+            if not st.isup or 'loopback' in name or 'pseudo' in name:
+                continue
+            fallback.append(nic)
+            if any(pref in name for pref in PREFERRED_INTERFACES):
+                preferred.append(nic)
+        return preferred, fallback
 
     def _background_logger(self):
-        """Infinite loop for local environments to log metrics at 10s boundaries."""
+        """Logs metrics at wall-clock log_interval boundaries until shutdown() is called."""
         while True:
             try:
-                now = time.time()
-                sleep_time = self.log_interval - (now % self.log_interval)
-                if sleep_time < 0.1: sleep_time += self.log_interval
-                time.sleep(sleep_time)
+                # Absolute deadline of the next boundary; waiting on the stop event lets
+                # shutdown interrupt the wait instead of leaving the thread mid-sleep
+                deadline = (math.floor(time.time() / self.log_interval) + 1) * self.log_interval
+                if self._stop.wait(max(0.0, deadline - time.time())):
+                    return
                 self._log_to_db()
             except Exception as e:
-                print(f"Error in background logger: {e}")
-                time.sleep(2)
+                logger.error("Error in background logger: %s", e)
+                self._stop.wait(2)
 
     def _log_to_db(self):
-        """Calculates metrics and inserts into SQLite."""
+        """Aggregates the samples since the last row and queues it for the SQLite writer."""
         try:
             with self.lock:
                 now_ts = time.time()
@@ -214,55 +591,169 @@ class NetworkState:
                     return
                 self.last_log_time = now_ts
 
-            metrics = self.get_current_metrics(internal=True)
-            if not metrics:
-                return
+            row = self._aggregate_samples()
+            if row is None:
+                # No monitor samples (serverless): fall back to one instantaneous reading
+                row = self._compute_log_row()
+            voip, http, ftp, delay, tput, loss, state = row
+            now = datetime.fromtimestamp(now_ts, timezone.utc).isoformat()
+            now_str = time.strftime("%H:%M:%S", time.localtime(now_ts))
 
-            voip = metrics['traffic']['voip']
-            http = metrics['traffic']['http']
-            ftp = metrics['traffic']['ftp']
-            delay = metrics['performance']['delay']
-            tput = metrics['performance']['throughput']
-            loss = metrics['performance']['packet_loss']
-            state = metrics['ml']['state']
-            now = datetime.now(timezone.utc).isoformat()
-            now_local = datetime.now()
-            now_str = now_local.strftime("%H:%M:%S")
-
-            conn = self._get_db_connection()
-            if conn:
-                try:
-                    cur = conn.cursor()
-                    cur.execute("""
-                        INSERT INTO network_logs 
-                        (timestamp, time_str, voip_kbps, http_mbps, ftp_mbps, delay_ms, throughput_gbps, packet_loss_pct, state)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        now, now_str, voip, http, ftp, delay, tput, loss, state
-                    ))
-                    conn.commit()
-                except Exception as e:
-                    print(f"Error inserting into DB: {e}")
-                finally:
-                    conn.close()
+            try:
+                self._log_q.put_nowait((
+                    now, now_str, round(voip), round(http, 1), round(ftp, 1),
+                    round(delay, 1), round(tput, 2), round(loss, 2), state
+                ))
+            except queue.Full:
+                logger.warning("Log queue full, dropping sample")
+            # No writer thread in serverless mode, so write through immediately
+            if self.on_vercel:
+                self._flush_log_buffer()
+        except Exception as e:
+            logger.error("Error in _log_to_db: %s", e)
+
+    def _record_sample(self):
+        """Appends one numeric reading to the SoA ring; called by the traffic monitor per sample."""
+        *values, state = self._compute_log_row()
+        self._ring[self._ring_count % SAMPLE_RING_SIZE] = (*values, STATE_CODES[state])
+        self._ring_count += 1
+
+    def _aggregate_samples(self):
+        """
+        Averages the ring samples taken since the previous log row; the state is the most
+        frequent one in the window. Returns None when no new samples exist.
+        """
+        end = self._ring_count
+        start = max(self._ring_logged, end - SAMPLE_RING_SIZE)
+        self._ring_logged = end
+        if end <= start:
+            return None
+        idx = np.arange(start, end) % SAMPLE_RING_SIZE
+        window = self._ring[idx]
+        state = STATE_NAMES[int(np.bincount(window[:, 6].astype(np.intp), minlength=3).argmax())]
+        return (*window[:, :6].mean(axis=0).tolist(), state)
+
+    def _log_writer(self):
+        """
+        Blocks for the next log row, then drains whatever else is already queued into the
+        same executemany and writes it at once, so rows reach /api/dataset without waiting.
+        A None in the queue (queued by shutdown) flushes the pending batch and exits.
+        """
+        done = False
+        while not done:
+            try:
+                row = self._log_q.get()
+                if row is None:
+                    return
+                batch = [row]
+                while True:
+                    try:
+                        row = self._log_q.get_nowait()
+                    except queue.Empty:
+                        break
+                    if row is None:
+                        done = True
+                        break
+                    batch.append(row)
+                self._write_log_rows(batch)
+            except Exception as e:
+                logger.error("Error in log writer: %s", e)
+                self._stop.wait(2)
+
+    def shutdown(self):
+        """Stops the background loops, flushes queued log rows and closes pooled connections."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        # Release /api/stream generators blocked on the next sample
+        with self._sample_cond:
+            self._sample_cond.notify_all()
+        self.bg_thread.join(timeout=2)
+        try:
+            # The writer is draining, so room frees up for the sentinel
+            self._log_q.put(None, timeout=5)
+            self.writer_thread.join(timeout=5)
+        except queue.Full:
+            pass
+        self._flush_log_buffer()
+        while True:
+            try:
+                self.db_pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def _flush_log_buffer(self):
+        """Writes whatever is currently queued without waiting for the writer thread."""
+        rows = []
+        while True:
+            try:
+                rows.append(self._log_q.get_nowait())
+            except queue.Empty:
+                break
+        self._write_log_rows(rows)
+
+    def _write_log_rows(self, rows):
+        """Inserts rows with a single executemany + commit, pruning expired rows hourly."""
+        if not rows:
+            return
+        conn = self._get_db_connection()
+        if not conn:
+            return
+        try:
+            cur = conn.cursor()
+            cur.executemany(LOG_INSERT_SQL, rows)
+            now = time.monotonic()
+            if now >= self._next_prune:
+                self._next_prune = now + LOG_PRUNE_INTERVAL
+                cutoff = datetime.now(timezone.utc) - timedelta(days=LOG_RETENTION_DAYS)
+                cur.execute(LOG_PRUNE_SQL, (cutoff.isoformat(),))
+            conn.commit()
         except Exception as e:
-            print(f"Error in _log_to_db: {e}")
+            logger.error("Error inserting into DB: %s", e)
+            # Drop the connection so the next batch reconnects instead of reusing a bad handle
+            self._release_db_connection(conn, broken=True)
+        else:
+            self._release_db_connection(conn)
 
     def _get_db_connection(self):
+        """Borrow a pooled connection, opening a new one only when the pool is empty."""
+        try:
+            return self.db_pool.get_nowait()
+        except queue.Empty:
+            pass
         try:
-            conn = sqlite3.connect(self.db_path, timeout=10)
+            # Connections are handed between request and background threads
+            conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False, cached_statements=32)
             conn.row_factory = sqlite3.Row
+            # Metrics are disposable: with WAL, NORMAL skips the fsync on every commit and
+            # only risks the last few rows on power loss (the SQLite analogue of
+            # synchronous_commit=off)
+            conn.execute("PRAGMA synchronous=NORMAL")
             return conn
         except Exception as e:
-            print(f"Error connecting to database: {e}")
+            logger.error("Error connecting to database: %s", e)
             return None
 
+    def _release_db_connection(self, conn, broken=False):
+        """Return a connection to the pool; close it if it errored or the pool is full."""
+        if broken:
+            conn.close()
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self.db_pool.put_nowait(conn)
+        except (queue.Full, sqlite3.Error):
+            conn.close()
+
     def _init_db(self):
         conn = self._get_db_connection()
         if not conn: return
         
         try:
             cur = conn.cursor()
+            # WAL is persistent on the file: appends stop blocking /api/dataset readers
+            cur.execute("PRAGMA journal_mode=WAL")
             cur.execute("""
                 CREATE TABLE IF NOT EXISTS network_logs (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -277,221 +768,302 @@ class NetworkState:
                     state VARCHAR(10)
                 );
             """)
+            # Lets /api/dataset read the newest rows by index instead of sorting the table
+            cur.execute("CREATE INDEX IF NOT EXISTS network_logs_ts_idx ON network_logs (timestamp DESC);")
             conn.commit()
         except Exception as e:
-            print(f"Error initializing database table: {e}")
+            logger.error("Error initializing database table: %s", e)
         finally:
-            conn.close()
+            self._release_db_connection(conn)
+        
+    def _process_monitor(self):
+        """Rescans the top I/O processes every procs_interval seconds, off the request path."""
+        while True:
+            self._active_processes = self._scan_active_processes()
+            if self._stop.wait(self.procs_interval):
+                return
+
+    def _scan_active_processes(self):
+        """Top I/O processes; process_iter walks every PID, so only the monitor thread calls this."""
+        active_processes = []
+        try:
+            procs = []
+            # Only I/O counters for every PID; names are resolved for the top few below
+            for p in psutil.process_iter(['io_counters']):
+                io = p.info.get('io_counters')
+                if io:
+                    total_io = getattr(io, 'read_bytes', getattr(io, 'read_count', 0)) + \
+                               getattr(io, 'write_bytes', getattr(io, 'write_count', 0))
+                    procs.append((total_io, p))
+            for _, p in heapq.nlargest(6, procs, key=lambda x: x[0]):
+                try:
+                    name = p.name()
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+                if name != 'System Idle Process':
+                    active_processes.append(name)
+            active_processes = active_processes[:5]
+        except Exception as e:
+            logger.error("Error fetching processes: %s", e)
+        return active_processes
+
+    def update_config(self, data):
+        """Publishes a new Config (copy-on-write) and returns it."""
+        changes = {}
+        if 'voip_alloc' in data: changes['voip_alloc'] = int(data['voip_alloc'])
+        if 'threshold' in data: changes['threshold'] = float(data['threshold'])
+        if 'ftp_prio' in data: changes['ftp_prio'] = data['ftp_prio']
+        with self.config_lock:
+            config = replace(self.config, **changes)
+            self._qos_table = build_qos_table(config)
+            self.config = config
+            self.config_version += 1
+            # Next /api/status poll must reflect the new allocation
+            self._status_cache = (0.0, None)
+        return config
+
+    def _feature_buffer(self):
+        features = getattr(self._local, 'features', None)
+        if features is None:
+            features = np.empty((1, 4), dtype=np.float32)
+            self._local.features = features
+        return features
+
+    def _randoms(self):
+        """
+        Next [cloud noise, arrival, jitter, queue] draw from this thread's pre-generated
+        block; one numpy call refills RANDOM_BLOCK_ROWS rows as plain Python floats.
+        """
+        block = getattr(self._local, 'randoms', None)
+        if not block:
+            block = self._rng.random((RANDOM_BLOCK_ROWS, 4)).tolist()
+            self._local.randoms = block
+        return block.pop()
+
+    def _response_skeleton(self):
+        """
+        Per-thread nested response dict, allocated once and overwritten on every call.
+        Callers must serialize or copy it before the same thread computes metrics again.
+        """
+        resp = getattr(self._local, 'resp', None)
+        if resp is None:
+            resp = {
+                "processes": [],
+                "traffic": {"voip": 0, "http": 0.0, "ftp": 0.0, "aggregate": 0.0, "sent": 0.0, "recv": 0.0},
+                "monitoring": {"arrival_rate": 0, "delay": 0.0, "queue_length": 0, "interface": ""},
+                "ml": {"state": "low", "confidence": 0.0, "infer_time": 0.0},
+                "qos": {
+                    "bandwidth": {"voip": 0, "http": 0, "ftp": 0},
+                    "queues": {"voip": 0, "http": 0, "ftp": 0}
+                },
+                "router": {"link_utilization": 0, "queue_occupancy": 0},
+                "performance": {
+                    "delay": 0.0, "throughput": 0.0, "packet_loss": 0.0,
+                    "fifo_delay": 0.0, "fifo_loss": 0.0,
+                    "improvement_delay": 0.0, "improvement_loss": 0.0, "improvement_tput": 0.0
+                },
+                "alerts": []
+            }
+            self._local.resp = resp
+        return resp
+
+    def _current_traffic(self, now, r_cloud):
+        """Returns (total_load, sent_mbps, recv_mbps, interface) for this instant."""
+        # If on Vercel, generate a dynamic sinusoid for the "cloud feel"
+        if self.on_vercel:
+            base = 0.5 + 0.3 * math.sin(now / 10.0) + (r_cloud * 0.2 - 0.1)
+            total_load = max(0.1, base)
+            return total_load, total_load * 0.4, total_load * 0.6, "Vercel Cloud"
+        return self._traffic_snapshot
+
+    def _classify(self, cfg, total_load, base_delay, queue_length, arrival_rate, utilization_ratio):
+        """Decision Tree ML for Traffic Network; returns (state, confidence %)."""
+        if self._tree is not None:
+            state, prob = walk_tree(self._tree, (total_load, base_delay, queue_length, arrival_rate))
+            return state, round(prob * 100, 1)
+        if self.model:
+            # Prepare features for prediction in a reused float32 row (the tree's native dtype)
+            features = self._feature_buffer()
+            features[0, 0] = total_load
+            features[0, 1] = base_delay
+            features[0, 2] = queue_length
+            features[0, 3] = arrival_rate
+            if self._classes is not None and hasattr(self.model, 'predict_proba'):
+                # Other classifiers: one predict_proba pass, class taken from the argmax
+                probs = self.model.predict_proba(features)[0]
+                idx = int(probs.argmax())
+                return str(self._classes[idx]), round(float(probs[idx]) * 100, 1)
+            return self.model.predict(features)[0], 95.0
+        # Fallback to threshold logic if model not loaded
+        threshold = cfg.threshold
+        if utilization_ratio < threshold:
+            return "low", 80.0
+        if utilization_ratio < min(0.95, threshold + 0.35):
+            return "med", 80.0
+        return "high", 80.0
+
+    def _compute_log_row(self):
+        """
+        Numeric-only reading for the log: link features, ML state and adaptive performance,
+        skipping alerts, process lists and the response dict.
+        Returns (voip, http, ftp, delay, throughput, loss, state), unrounded.
+        """
+        r_cloud, r_arrival, r_jitter, r_queue = self._randoms()
+        total_load = self._current_traffic(time.time(), r_cloud)[0]
+        (voip_kbps, http_mbps, ftp_mbps, arrival_rate,
+         utilization_ratio, base_delay, queue_length) = derive_link_features(
+            total_load, int(r_arrival * 6), r_jitter - 0.5, int(r_queue * 3) - 1)
+        state, _ = self._classify(
+            self.config, total_load, base_delay, queue_length, arrival_rate, utilization_ratio)
+        final_delay, final_tput, packet_loss = adaptive_performance(
+            state, total_load, base_delay, utilization_ratio)[:3]
+        return voip_kbps, http_mbps, ftp_mbps, final_delay, final_tput, packet_loss, state
+
+    def _derive_metrics(self, cfg, qos_table, total_load, r_arrival, r_jitter, r_queue):
+        """Steps 2-5 of get_current_metrics for one load reading, as a flat tuple."""
+        # 2. Traffic Monitoring / Feature Extraction (pure numeric core, noise drawn by the caller)
+        (voip_kbps, http_mbps, ftp_mbps, arrival_rate,
+         utilization_ratio, base_delay, queue_length) = derive_link_features(
+            total_load, int(r_arrival * 6), r_jitter - 0.5, int(r_queue * 3) - 1)
+        
+        # 3. Decision Tree ML for Traffic Network
+        start_time = time.perf_counter()
+        state, confidence = self._classify(
+            cfg, total_load, base_delay, queue_length, arrival_rate, utilization_ratio)
+        infer_time = round((time.perf_counter() - start_time) * 1000, 2)
+
+        # 4. Adaptive QoS Controller (Resource Allocation)
+        # Logic derived from ML-Driven Adaptive QoS script, precomputed per config
+        qos_row = qos_table[state]
+
+        # 5. Performance Comparison Engine (Adaptive vs FIFO)
+        link_utilization = min(100, int(utilization_ratio * 100))
+        queue_occupancy = min(100, int((queue_length / 500.0) * 100))
         
-    def get_current_metrics(self, internal=False):
+        (final_delay, final_tput, packet_loss,
+         fifo_delay, fifo_loss, fifo_tput) = adaptive_performance(
+            state, total_load, base_delay, utilization_ratio)
+
+        # Calculate Improvements (%)
+        improvement_delay = max(0, ((fifo_delay - final_delay) / fifo_delay) * 100)
+        improvement_loss = max(0, ((fifo_loss - packet_loss) / max(0.01, fifo_loss)) * 100)
+        improvement_tput = max(0, ((final_tput - fifo_tput) / max(0.01, fifo_tput)) * 100)
+
+        return (voip_kbps, http_mbps, ftp_mbps, arrival_rate, utilization_ratio, base_delay,
+                queue_length, state, confidence, infer_time, qos_row, link_utilization,
+                queue_occupancy, final_delay, final_tput, packet_loss, fifo_delay, fifo_loss,
+                improvement_delay, improvement_loss, improvement_tput)
+
+    def get_current_metrics(self):
         now = time.time()
-        import random
         
-        # Consistent locking for both internal and external callers
+        # Lock-free reads: the traffic snapshot, Config and QoS table are replaced, never mutated
+        # (version first: update_config bumps it after publishing the new config)
+        config_version = self.config_version
+        cfg = self.config
+        qos_table = self._qos_table
         try:
-            with self.lock:
-                # 1. Read stable traffic from monitor thread
-                # If on Vercel, generate a dynamic sinusoid for the "cloud feel"
-                if self.on_vercel:
-                    t = time.time()
-                    base = 0.5 + 0.3 * math.sin(t / 10.0) + random.uniform(-0.1, 0.1)
-                    self.current_load_mbps = max(0.1, base)
-                    self.current_sent_mbps = self.current_load_mbps * 0.4
-                    self.current_recv_mbps = self.current_load_mbps * 0.6
-                
-                total_load = self.current_load_mbps
-    
-                # Distribute real load proportionally into our standard traffic bins for UI
-                if total_load < 1.0:
-                    voip_kbps = max(20, total_load * 1000 * 0.4)
-                    http_mbps = max(0.1, total_load * 0.5)
-                    ftp_mbps = max(0.0, total_load * 0.1)
-                else:
-                    voip_kbps = max(50, total_load * 1000 * 0.1)
-                    http_mbps = max(0.5, total_load * 0.7)
-                    ftp_mbps = max(0.1, total_load * 0.2)
-                
-                # 2. Traffic Monitoring / Feature Extraction
-                # Arrival rate scales with total load
-                arrival_rate = int(total_load * 120 + random.randint(0, 5))
-                
-                # Base delay increases exponentially as real load approaches arbitrary capacity
-                # Lowering virtual capacity to 25 Mbps for high sensitivity to Wi-Fi/Mobile browsing
-                virtual_capacity = 25.0
-                utilization_ratio = min(0.99, total_load / virtual_capacity) 
-                # Add natural jitter even at low load
-                jitter = random.uniform(-0.5, 0.5) if total_load > 0 else 0
-                base_delay = (5.0 / (1.0 - utilization_ratio)) + jitter
-                
-                # Active Queue activity (starting at 1 Mbps - typical web browsing)
-                if total_load > 0.1:
-                    queue_length = 5 + int(max(0, (total_load - 1.0) * 20))
-                    queue_length += random.randint(-1, 1)
-                else: 
-                    queue_length = 0
-                queue_length = max(0, queue_length)
-                
-                # 3. Decision Tree ML for Traffic Network
-                start_time = time.perf_counter()
-                if self.model:
-                    # Prepare features for prediction
-                    features = pd.DataFrame([[total_load, base_delay, queue_length, arrival_rate]], 
-                                            columns=['load_mbps', 'delay_ms', 'queue_length', 'arrival_rate'])
-                    state = self.model.predict(features)[0]
-                    
-                    # Use probability for confidence if available
-                    try:
-                        probs = self.model.predict_proba(features)[0]
-                        confidence = round(max(probs) * 100, 1)
-                    except:
-                        confidence = 95.0
-                else:
-                    # Fallback to threshold logic if model not loaded
-                    if utilization_ratio < self.config['threshold']:
-                        state = "low"
-                    elif utilization_ratio < min(0.95, self.config['threshold'] + 0.35):
-                        state = "med"
-                    else:
-                        state = "high"
-                    confidence = 80.0
-                    
-                infer_time = round((time.perf_counter() - start_time) * 1000, 2)
-    
-                # 4. Adaptive QoS Controller (Resource Allocation)
-                # Logic derived from ML-Driven Adaptive QoS script
-                if state == "low":
-                    # More balanced priorities (5, 4, 3)
-                    bw_voip, bw_http, bw_ftp = 25, 45, 30
-                    q_voip, q_http, q_ftp = 10, 30, 60
-                elif state == "med":
-                    # Moderate VoIP preference (6, 3, 2)
-                    bw_voip, bw_http, bw_ftp = 40, 35, 25
-                    q_voip, q_http, q_ftp = 20, 40, 40
-                    # Apply FTP Priority Logic from User Config
-                    if self.config['ftp_prio'] == "high": bw_ftp += 10; bw_http -= 10
-                    if self.config['ftp_prio'] == "low": bw_ftp -= 10; bw_http += 10
-                else:
-                    # Strong VoIP protection (8, 2, 1)
-                    bw_voip = max(60, self.config['voip_alloc'])
-                    rem = 100 - bw_voip
-                    bw_http = int(rem * 0.7)
-                    bw_ftp = rem - bw_http
-                    q_voip, q_http, q_ftp = 50, 30, 20
+            if self.on_vercel:
+                # Load is synthesized per call here, so every call derives fresh metrics
+                # Randomness from the pre-drawn block: [cloud noise, arrival, jitter, queue]
+                r_cloud, r_arrival, r_jitter, r_queue = self._randoms()
+                total_load, sent_mbps, recv_mbps, active_interface = self._current_traffic(now, r_cloud)
+                derived = self._derive_metrics(cfg, qos_table, total_load, r_arrival, r_jitter, r_queue)
+            else:
+                # 1. Read stable traffic from monitor thread (sequence first: the monitor
+                # bumps it after publishing, so a race only costs one extra recompute)
+                sample_seq = self._sample_seq
+                total_load, sent_mbps, recv_mbps, active_interface = self._traffic_snapshot
+
+                # 2-5. Numeric core, memoized per traffic sample: repeat polls between two
+                # monitor ticks (and with the same config) reuse it and only rebuild the alerts
+                key = (sample_seq, config_version)
+                memo_key, derived = self._metrics_memo
+                if memo_key != key:
+                    # Fresh noise per sample, drawn only on a miss
+                    _, r_arrival, r_jitter, r_queue = self._randoms()
+                    derived = self._derive_metrics(cfg, qos_table, total_load, r_arrival, r_jitter, r_queue)
+                    self._metrics_memo = (key, derived)
+            (voip_kbps, http_mbps, ftp_mbps, arrival_rate, utilization_ratio, base_delay,
+             queue_length, state, confidence, infer_time, qos_row, link_utilization,
+             queue_occupancy, final_delay, final_tput, packet_loss, fifo_delay, fifo_loss,
+             improvement_delay, improvement_loss, improvement_tput) = derived
+            bw_voip, bw_http, bw_ftp, q_voip, q_http, q_ftp = qos_row
     
-                # 5. Performance Comparison Engine (Adaptive vs FIFO)
-                link_utilization = min(100, int(utilization_ratio * 100))
-                queue_occupancy = min(100, int((queue_length / 500.0) * 100))
-                
-                # Baseline (FIFO) metrics
-                fifo_delay = base_delay
-                fifo_loss = 0.05 + (utilization_ratio ** 2) * 10.0 if utilization_ratio > 0.4 else 0.01
-                fifo_tput = total_load * (1.0 - fifo_loss/100.0)
+            # Generate Alerts based on actual state transitions or thresholds
+            alerts = []
+
+            with self.lock:
+                prev_state = self.last_state
+                self.last_state = state
 
-                # ML-Adaptive metrics
+            # State Transition Alerts
+            if state != prev_state:
                 if state == "high":
-                    # Improved protection saves time-sensitive traffic (VoIP)
-                    final_delay = base_delay * 0.75  
-                    packet_loss = fifo_loss * 0.6
+                    alerts.append({"time": clock_label(now), "msg": f"SYSTEM: High Congestion Detected - QoS Policy Active ({bw_voip}% VoIP Reservation)", "cls": "warn"})
                 elif state == "med":
-                    final_delay = base_delay * 0.85
-                    packet_loss = fifo_loss * 0.4
-                else:
-                    final_delay = base_delay * 0.95
-                    packet_loss = fifo_loss * 0.2
-                    
-                final_tput = total_load * (1.0 - packet_loss/100.0)
+                    alerts.append({"time": clock_label(now), "msg": "SYSTEM: Moderate Load Detected - Adjusting Bandwidth Allocation", "cls": "ok"})
+                elif state == "low":
+                    alerts.append({"time": clock_label(now), "msg": "SYSTEM: Nominal Traffic Conditions - Policy Reset to Baseline", "cls": "ok"})
 
-                # Calculate Improvements (%)
-                improvement_delay = max(0, ((fifo_delay - final_delay) / fifo_delay) * 100)
-                improvement_loss = max(0, ((fifo_loss - packet_loss) / max(0.01, fifo_loss)) * 100)
-                improvement_tput = max(0, ((final_tput - fifo_tput) / max(0.01, fifo_tput)) * 100)
-    
-                # Generate Alerts based on actual state transitions or thresholds
-                alerts = []
-                now_str = datetime.now().strftime("%H:%M:%S")
-
-                # State Transition Alerts
-                if state != self.last_state:
-                    if state == "high":
-                        alerts.append({"time": now_str, "msg": f"SYSTEM: High Congestion Detected - QoS Policy Active ({bw_voip}% VoIP Reservation)", "cls": "warn"})
-                    elif state == "med":
-                        alerts.append({"time": now_str, "msg": "SYSTEM: Moderate Load Detected - Adjusting Bandwidth Allocation", "cls": "ok"})
-                    elif state == "low":
-                        alerts.append({"time": now_str, "msg": "SYSTEM: Nominal Traffic Conditions - Policy Reset to Baseline", "cls": "ok"})
-                    self.last_state = state
-
-                # Critical Threshold Alerts (always send if active)
-                if utilization_ratio > 0.85:
-                    alerts.append({"time": now_str, "msg": "CRITICAL: Link utilization exceeded 85% safety threshold", "cls": "crit"})
-                    
-                if packet_loss > 1.0:
-                     alerts.append({"time": now_str, "msg": f"ALERT: Elevated Packet Loss ({packet_loss:.1f}%) detected", "cls": "warn"})
+            # Critical Threshold Alerts (always send if active)
+            if utilization_ratio > 0.85:
+                alerts.append({"time": clock_label(now), "msg": "CRITICAL: Link utilization exceeded 85% safety threshold", "cls": "crit"})
+                
+            if packet_loss > 1.0:
+                 alerts.append({"time": clock_label(now), "msg": f"ALERT: Elevated Packet Loss ({packet_loss:.1f}%) detected", "cls": "warn"})
     
-                # Get real active processes causing I/O traffic (local only — not available on Vercel)
-                active_processes = []
-                if not self.on_vercel:
-                    try:
-                        procs = []
-                        for p in psutil.process_iter(['name', 'io_counters']):
-                            try:
-                                io = p.info.get('io_counters')
-                                if io:
-                                    total_io = getattr(io, 'read_bytes', getattr(io, 'read_count', 0)) + \
-                                               getattr(io, 'write_bytes', getattr(io, 'write_count', 0))
-                                    procs.append((p.info['name'], total_io))
-                            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                                continue
-                        sorted_procs = sorted(procs, key=lambda x: x[1], reverse=True)
-                        active_processes = [name for name, _ in sorted_procs[:5] if name != 'System Idle Process']
-                    except Exception as e:
-                        print(f"Error fetching processes: {e}")
+            # Real active processes causing I/O traffic, refreshed by the process monitor
+            # (local only — the list stays empty on Vercel where no threads run)
+            active_processes = self._active_processes
     
-                if not active_processes:
-                    active_processes = ["System Kernel", "Network Interface", "DCN Controller"]
+            if not active_processes:
+                active_processes = DEFAULT_PROCESSES
     
-                metrics_data = {
-                    "processes": active_processes,
-                    "traffic": {
-                        "voip": round(voip_kbps),
-                        "http": round(http_mbps, 1),
-                        "ftp": round(ftp_mbps, 1),
-                        "aggregate": round(total_load, 1),
-                        "sent": round(getattr(self, 'current_sent_mbps', 0), 2),
-                        "recv": round(getattr(self, 'current_recv_mbps', 0), 2)
-                    },
-                    "monitoring": {
-                        "arrival_rate": arrival_rate,
-                        "delay": round(base_delay, 1),
-                        "queue_length": queue_length,
-                        "interface": self.active_interface
-                    },
-                    "ml": {
-                        "state": state,
-                        "confidence": confidence,
-                        "infer_time": infer_time
-                    },
-                    "qos": {
-                        "bandwidth": {"voip": bw_voip, "http": bw_http, "ftp": bw_ftp},
-                        "queues": {"voip": q_voip, "http": q_http, "ftp": q_ftp}
-                    },
-                    "router": {
-                        "link_utilization": link_utilization,
-                        "queue_occupancy": queue_occupancy
-                    },
-                    "performance": {
-                        "delay": round(final_delay, 1),
-                        "throughput": round(final_tput, 2),
-                        "packet_loss": round(packet_loss, 2),
-                        "fifo_delay": round(fifo_delay, 1),
-                        "fifo_loss": round(fifo_loss, 2),
-                        "improvement_delay": round(improvement_delay, 1),
-                        "improvement_loss": round(improvement_loss, 1),
-                        "improvement_tput": round(improvement_tput, 1)
-                    },
-                    "alerts": alerts
-                }
+            # Fill leaf values of this thread's response skeleton in place
+            metrics_data = self._response_skeleton()
+            metrics_data["processes"] = active_processes
+            metrics_data["alerts"] = alerts
+
+            traffic = metrics_data["traffic"]
+            traffic["voip"] = round(voip_kbps)
+            traffic["http"] = round(http_mbps, 1)
+            traffic["ftp"] = round(ftp_mbps, 1)
+            traffic["aggregate"] = round(total_load, 1)
+            traffic["sent"] = round(sent_mbps, 2)
+            traffic["recv"] = round(recv_mbps, 2)
+
+            monitoring = metrics_data["monitoring"]
+            monitoring["arrival_rate"] = arrival_rate
+            monitoring["delay"] = round(base_delay, 1)
+            monitoring["queue_length"] = queue_length
+            monitoring["interface"] = active_interface
+
+            ml = metrics_data["ml"]
+            ml["state"] = state
+            ml["confidence"] = confidence
+            ml["infer_time"] = infer_time
+
+            bandwidth = metrics_data["qos"]["bandwidth"]
+            bandwidth["voip"], bandwidth["http"], bandwidth["ftp"] = bw_voip, bw_http, bw_ftp
+            queues = metrics_data["qos"]["queues"]
+            queues["voip"], queues["http"], queues["ftp"] = q_voip, q_http, q_ftp
+
+            router = metrics_data["router"]
+            router["link_utilization"] = link_utilization
+            router["queue_occupancy"] = queue_occupancy
+
+            performance = metrics_data["performance"]
+            performance["delay"] = round(final_delay, 1)
+            performance["throughput"] = round(final_tput, 2)
+            performance["packet_loss"] = round(packet_loss, 2)
+            performance["fifo_delay"] = round(fifo_delay, 1)
+            performance["fifo_loss"] = round(fifo_loss, 2)
+            performance["improvement_delay"] = round(improvement_delay, 1)
+            performance["improvement_loss"] = round(improvement_loss, 1)
+            performance["improvement_tput"] = round(improvement_tput, 1)
         except Exception as e:
-            print(f"Error in metrics calculation: {e}")
+            logger.error("Error in metrics calculation: %s", e)
             raise
         finally:
             pass
@@ -500,12 +1072,63 @@ class NetworkState:
 
 state_manager = NetworkState()
 
+def status_payload():
+    """Serialized metrics shared by /api/status and /api/stream."""
+    # Several tabs polling at 1 Hz share one computed snapshot per STATUS_CACHE_TTL; the
+    # (timestamp, bytes) tuple is swapped in whole, so readers never see a half-built entry.
+    # Alerts ride along in the cached payload and reach every client polling in that window.
+    ts, payload = state_manager._status_cache
+    now = time.monotonic()
+    if payload is None or now - ts >= STATUS_CACHE_TTL:
+        # Serialize straight to bytes, skipping jsonify's provider dispatch on the hottest route
+        payload = orjson.dumps(state_manager.get_current_metrics(), option=orjson.OPT_SERIALIZE_NUMPY)
+        state_manager._status_cache = (now, payload)
+    return payload
+
+
 @app.route('/api/status', methods=['GET'])
 def get_status():
     # Trigger lazy log for serverless environments
     if state_manager.on_vercel:
         state_manager._log_to_db()
-    return jsonify(state_manager.get_current_metrics())
+    response = app.response_class(status_payload(), mimetype='application/json')
+    # Dashboards poll every second; let browsers/proxies reuse a response for that long
+    response.headers['Cache-Control'] = 'public, max-age=1'
+    return response
+
+
+stream_slots = threading.BoundedSemaphore(STREAM_MAX_CLIENTS)
+
+
+@app.route('/api/stream', methods=['GET'])
+def stream_status():
+    """Server-Sent Events: pushes the /api/status payload after every traffic sample."""
+    if state_manager.on_vercel:
+        # Serverless functions cannot hold a stream open; the dashboard falls back to polling
+        return '', 204
+    if not stream_slots.acquire(blocking=False):
+        # All stream slots taken; 204 makes EventSource stop and the client poll instead
+        return '', 204
+
+    def events():
+        while True:
+            if state_manager.wait_for_sample(STREAM_KEEPALIVE):
+                yield b"data: " + status_payload() + b"\n\n"
+            elif state_manager._stop.is_set():
+                return
+            else:
+                # Comment line keeps idle proxies from closing the connection
+                yield b": keepalive\n\n"
+
+    # Each open stream holds one gthread worker thread for its lifetime
+    response = app.response_class(
+        events(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # Runs when the server closes the response, even if the generator never started
+    response.call_on_close(stream_slots.release)
+    return response
 
 
 @app.route('/api/cells', methods=['GET'])
@@ -531,7 +1154,7 @@ def get_cells():
     )
 
     try:
-        response = req_lib.get(url, timeout=15)
+        response = ocid_session.get(url, timeout=15)
         if response.status_code != 200:
             return jsonify({'error': 'OpenCelliD API error'}), response.status_code
 
@@ -553,6 +1176,67 @@ def get_cells():
         }), 500
 
 
+# Towers are quantized to ~890 m cells (1/125 degree) so nearby lookups share cache entries
+TOWER_GRID_PER_DEGREE = 125
+TOWER_CACHE_TTL = 24 * 60 * 60
+
+
+@functools.lru_cache(maxsize=4096)
+def fetch_towers(lat_q, lng_q, ttl_bucket):
+    """
+    Fetch and enrich OpenCelliD towers around a quantized grid point. Cached per
+    (lat_q, lng_q) until ttl_bucket rolls over; upstream errors raise and are never cached.
+    Returns None when the area has no towers.
+    """
+    lat = lat_q / TOWER_GRID_PER_DEGREE
+    lng = lng_q / TOWER_GRID_PER_DEGREE
+    radius = 800           # 800m radius search around the point
+    url = (
+        f"https://api.opencellid.org/cell/getInArea"
+        f"?key={os.environ.get('OPENCELLID_API_KEY')}&lat={lat}&lon={lng}&radius={radius}&format=json"
+    )
+
+    resp = ocid_session.get(url, timeout=15)
+    resp.raise_for_status()
+    data = resp.json()
+
+    # Check for API errors in response
+    if 'error' in data:
+        raise RuntimeError(f"OpenCelliD API Error: {data['error']}")
+
+    raw_cells = (data.get('cells') or [])[:500]
+    if not raw_cells:
+        return None
+
+    nearby_count = len(raw_cells)
+    enriched_cells = []
+    total_estimated_load = 0.0
+
+    for cell in raw_cells:
+        enriched_cell = dict(cell)
+        traffic = estimate_tower_traffic(enriched_cell, nearby_count)
+        enriched_cell.update(traffic)
+        total_estimated_load += traffic['estimated_load_mbps']
+        enriched_cells.append(enriched_cell)
+
+    avg_utilization = round(
+        sum(cell['estimated_utilization_pct'] for cell in enriched_cells) / max(1, len(enriched_cells)),
+        1
+    )
+
+    data['cells'] = enriched_cells
+    data['source'] = 'OpenCelliD'
+    data['real_traffic_available'] = False
+    data['traffic_mode'] = 'inferred_from_live_tower_inventory'
+    data['summary'] = {
+        'tower_count': nearby_count,
+        'estimated_total_load_mbps': round(total_estimated_load, 2),
+        'average_utilization_pct': avg_utilization,
+        'note': 'Tower records are live from OpenCelliD. Traffic values are inferred because public carrier APIs do not expose real per-tower utilization.'
+    }
+    return data
+
+
 @app.route('/api/towers', methods=['GET'])
 def get_towers():
     """Return real OpenCelliD towers plus clearly labeled inferred load metrics."""
@@ -565,55 +1249,19 @@ def get_towers():
     
     # Try OpenCelliD if key is available
     if OCID_KEY:
-        radius = 800           # 800m radius search around the point
-        url = (
-            f"https://api.opencellid.org/cell/getInArea"
-            f"?key={OCID_KEY}&lat={lat}&lon={lng}&radius={radius}&format=json"
-        )
-
         try:
-            resp = req_lib.get(url, timeout=15)
-            resp.raise_for_status()
-            data = resp.json()
-            
-            # Check for API errors in response
-            if 'error' in data:
-                print(f"OpenCelliD API Error: {data['error']}")
-            else:
-                raw_cells = (data.get('cells') or [])[:500]
-                if raw_cells:  # Only return if we got data
-                    nearby_count = len(raw_cells)
-                    enriched_cells = []
-                    total_estimated_load = 0.0
-
-                    for cell in raw_cells:
-                        enriched_cell = dict(cell)
-                        traffic = estimate_tower_traffic(enriched_cell, nearby_count)
-                        enriched_cell.update(traffic)
-                        total_estimated_load += traffic['estimated_load_mbps']
-                        enriched_cells.append(enriched_cell)
-
-                    avg_utilization = round(
-                        sum(cell['estimated_utilization_pct'] for cell in enriched_cells) / max(1, len(enriched_cells)),
-                        1
-                    )
-
-                    data['cells'] = enriched_cells
-                    data['source'] = 'OpenCelliD'
-                    data['real_traffic_available'] = False
-                    data['traffic_mode'] = 'inferred_from_live_tower_inventory'
-                    data['summary'] = {
-                        'tower_count': nearby_count,
-                        'estimated_total_load_mbps': round(total_estimated_load, 2),
-                        'average_utilization_pct': avg_utilization,
-                        'note': 'Tower records are live from OpenCelliD. Traffic values are inferred because public carrier APIs do not expose real per-tower utilization.'
-                    }
-                    return jsonify(data)
+            data = fetch_towers(
+                round(lat * TOWER_GRID_PER_DEGREE),
+                round(lng * TOWER_GRID_PER_DEGREE),
+                int(time.time() // TOWER_CACHE_TTL)
+            )
+            if data:  # Only return if we got data
+                return jsonify(data)
         except Exception as e:
-            print(f"OpenCelliD fetch error: {e}")
+            logger.error("OpenCelliD fetch error: %s", e)
     
     # Fallback: return failure so the frontend will retry via Overpass API
-    print(f"OpenCelliD unavailable or no data. Frontend will use Overpass API fallback.")
+    logger.warning("OpenCelliD unavailable or no data. Frontend will use Overpass API fallback.")
     return jsonify({
         'error': 'Use Overpass API',
         'cells': [],
@@ -624,25 +1272,25 @@ def get_towers():
 
 @app.route('/')
 def index():
-    import os
-    return send_from_directory(os.getcwd(), 'index.html')
+    # Resolved against the app directory (not the cwd); with compress_response this answers
+    # If-None-Match / If-Modified-Since with a 304 so polling dashboards skip the body
+    return send_from_directory(app.root_path, 'index.html')
 
 @app.route('/api/config', methods=['POST'])
 def update_config():
-    from flask import request
-    data = request.json
+    data = flask_request.json
     if not data:
         return jsonify({"status": "error", "msg": "No data provided"}), 400
     
     # Update state manager config
-    if 'voip_alloc' in data: state_manager.config['voip_alloc'] = int(data['voip_alloc'])
-    if 'threshold' in data: state_manager.config['threshold'] = float(data['threshold'])
-    if 'ftp_prio' in data: state_manager.config['ftp_prio'] = data['ftp_prio']
+    config = state_manager.update_config(data)
     
-    return jsonify({"status": "success", "config": state_manager.config})
+    return jsonify({"status": "success", "config": asdict(config)})
 
 @app.route('/api/dataset', methods=['GET'])
 def get_dataset():
+    # Write out buffered rows first so the table reflects the latest samples
+    state_manager._flush_log_buffer()
     # Fetch from SQLite
     conn = state_manager._get_db_connection()
     if not conn:
@@ -650,36 +1298,26 @@ def get_dataset():
         
     try:
         cur = conn.cursor()
-        cur.execute("""
-            SELECT 
-                timestamp,
-                time_str as time, 
-                voip_kbps as voip, 
-                http_mbps as http, 
-                ftp_mbps as ftp,
-                delay_ms as delay, 
-                throughput_gbps as throughput, 
-                packet_loss_pct as loss, 
-                state 
-            FROM network_logs 
-            ORDER BY id DESC 
-            LIMIT 1000
-        """)
-        rows = [dict(row) for row in cur.fetchall()]
+        cur.row_factory = None  # Plain tuples; rows are transposed into columns below
+        cur.execute(DATASET_SELECT_SQL, (DATASET_ROW_LIMIT,))
+        names = [col[0] for col in cur.description]
+        rows = cur.fetchall()
+        # Columnar payload: one key per column instead of repeating keys on every row
+        columns = list(zip(*rows)) if rows else [()] * len(names)
+        dataset = {name: list(values) for name, values in zip(names, columns)}
         # Trigger lazy log check on dataset fetch too
         if state_manager.on_vercel:
              state_manager._log_to_db()
-        return jsonify(rows)
+        return jsonify(dataset)
     except Exception as e:
-        print(f"Error fetching logs: {e}")
+        logger.error("Error fetching logs: %s", e)
         return jsonify({"error": str(e)}), 500
     finally:
-        conn.close()
+        state_manager._release_db_connection(conn)
 
 @app.route('/api/seed', methods=['POST'])
 def seed_dataset():
     """Inject 24 hours of realistic sample rows (every minute) for demo purposes."""
-    import random, math
     conn = state_manager._get_db_connection()
     if not conn:
         return jsonify({"error": "No DB connection"}), 500
@@ -689,7 +1327,7 @@ def seed_dataset():
         base_time = datetime.now(timezone.utc)
         # Generate 144 rows: every 10 minutes over 24 hours (going backwards)
         for i in range(144, 0, -1):
-            t = base_time - __import__('datetime').timedelta(minutes=i * 10)
+            t = base_time - timedelta(minutes=i * 10)
             local_t = t.astimezone()  # convert to local
             time_str = local_t.strftime("%H:%M:%S")
             # Simulate periodic load pattern with sine wave
@@ -717,17 +1355,13 @@ def seed_dataset():
             tput = round(load * 100 * (1.0 - loss / 100.0), 2)
             rows.append((t.isoformat(), time_str, voip, http, ftp, delay, tput, loss, state))
 
-        cur.executemany("""
-            INSERT INTO network_logs
-            (timestamp, time_str, voip_kbps, http_mbps, ftp_mbps, delay_ms, throughput_gbps, packet_loss_pct, state)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, rows)
+        cur.executemany(LOG_INSERT_SQL, rows)
         conn.commit()
         return jsonify({"status": "ok", "inserted": len(rows)})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     finally:
-        conn.close()
+        state_manager._release_db_connection(conn)
 
 
 @app.route('/api/dataset/clear', methods=['POST'])
@@ -744,9 +1378,10 @@ def clear_dataset():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     finally:
-        conn.close()
+        state_manager._release_db_connection(conn)
 
 
 if __name__ == '__main__':
+    # Local development only; production runs under gunicorn (see gunicorn.conf.py)
     port = int(os.environ.get('PORT', 5002))
-    app.run(debug=False, host='0.0.0.0', port=port)
+    app.run(debug=False, threaded=True, host='0.0.0.0', port=port)
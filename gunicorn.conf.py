@@ -0,0 +1,26 @@
+# Production launcher: gunicorn app:app  (picks up this file automatically)
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5002)}"
+
+# NetworkState is a per-process singleton: config, last_state transition alerts, the
+# /api/status cache and the background logger all live in it, so a second worker would
+# answer with its own copy and log its own rows. Stay on one process and scale with
+# threads instead: request handlers only take short locks, and psutil / SQLite /
+# OpenCelliD calls release the GIL.
+worker_class = "gthread"
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+if workers != 1:
+    raise SystemExit(
+        f"WEB_CONCURRENCY={workers}: this app keeps its state in one process and must run "
+        "with a single worker; raise GUNICORN_THREADS for more concurrency"
+    )
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+
+# Import the app in the worker, not the master: NetworkState's threads and SQLite
+# pool must be created after fork
+preload_app = False
+
+# /api/towers waits up to 15s on OpenCelliD
+timeout = 30
+keepalive = 5
@@ -5,46 +5,50 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split, GridSearchCV, cross_val_score
 import joblib
 
-def generate_synthetic_data(samples=5000):
+def generate_synthetic_data(samples=5000, seed=None):
     """
     Generate more detailed synthetic data that captures the relationships 
     found in the ML-driven QoS simulation script.
     """
-    import random
-    data = []
+    rng = np.random.default_rng(seed)
     
     # Simulate a wide range of network scenarios
-    for _ in range(samples):
-        # Features: load_mbps (0-100), delay_ms (5-500), queue_length (0-500), arrival_rate (0-15000)
-        load = random.uniform(0.1, 100.0)
-        
-        # Base relationships: High load -> high delay, high queue length
-        # Low congestion (< 35 Mbps)
-        if load < 35.0:
-            delay = 5.0 + random.uniform(0, 5) * (load / 10.0)
-            queue = int(load * 0.5 + random.uniform(0, 5))
-            arrival = int(load * 120 + random.uniform(-50, 50))
-            state = "low"
-        # Medium congestion (35 - 75 Mbps)
-        elif load < 75.0:
-            delay = 15.0 + random.uniform(5, 15) * (load / 20.0)
-            queue = int(load * 2.0 + random.uniform(20, 100))
-            arrival = int(load * 125 + random.uniform(-100, 100))
-            state = "med"
-        # High congestion (> 75 Mbps)
-        else:
-            delay = 50.0 + random.uniform(50, 200) * (load / 50.0)
-            queue = int(load * 4.0 + random.uniform(100, 300))
-            arrival = int(load * 130 + random.uniform(-200, 200))
-            state = "high"
-            
-        data.append([load, delay, queue, arrival, state])
-    
-    return pd.DataFrame(data, columns=['load_mbps', 'delay_ms', 'queue_length', 'arrival_rate', 'state'])
+    # Features: load_mbps (0-100), delay_ms (5-500), queue_length (0-500), arrival_rate (0-15000)
+    load = rng.uniform(0.1, 100.0, samples)
+    
+    # Congestion level per sample: 0 = low (< 35 Mbps), 1 = med (35 - 75 Mbps), 2 = high (> 75 Mbps)
+    level = np.digitize(load, [35.0, 75.0])
+    
+    # Base relationships: High load -> high delay, high queue length
+    # Per-level coefficients, indexed by `level` so every feature is one vectorized draw
+    delay_base = np.array([5.0, 15.0, 50.0])[level]
+    delay_lo = np.array([0.0, 5.0, 50.0])[level]
+    delay_hi = np.array([5.0, 15.0, 200.0])[level]
+    delay_div = np.array([10.0, 20.0, 50.0])[level]
+    delay = delay_base + rng.uniform(delay_lo, delay_hi) * (load / delay_div)
+    
+    queue_mult = np.array([0.5, 2.0, 4.0])[level]
+    queue_lo = np.array([0.0, 20.0, 100.0])[level]
+    queue_hi = np.array([5.0, 100.0, 300.0])[level]
+    queue = (load * queue_mult + rng.uniform(queue_lo, queue_hi)).astype(int)
+    
+    arrival_mult = np.array([120.0, 125.0, 130.0])[level]
+    arrival_jitter = np.array([50.0, 100.0, 200.0])[level]
+    arrival = (load * arrival_mult + rng.uniform(-arrival_jitter, arrival_jitter)).astype(int)
+    
+    state = np.array(["low", "med", "high"])[level]
+    
+    return pd.DataFrame({
+        'load_mbps': load,
+        'delay_ms': delay,
+        'queue_length': queue,
+        'arrival_rate': arrival,
+        'state': state
+    })
 
 def train():
     print("Generating comprehensive synthetic dataset for ML-Driven QoS...")
-    df = generate_synthetic_data(10000)
+    df = generate_synthetic_data(10000, seed=42)
     
     X = df[['load_mbps', 'delay_ms', 'queue_length', 'arrival_rate']]
     y = df['state']
@@ -1,6 +1,6 @@
 import joblib
-import pandas as pd
 import numpy as np
+from sklearn.tree import export_text
 
 def test_model():
     print("Loading model...")
@@ -18,8 +18,19 @@ def test_model():
         [95.0, 120.0, 400.0, 12000] # high
     ]
     
-    df = pd.DataFrame(test_data, columns=['load_mbps', 'delay_ms', 'queue_length', 'arrival_rate'])
-    predictions = model.predict(df)
+    feature_names = ['load_mbps', 'delay_ms', 'queue_length', 'arrival_rate']
+
+    # The fitted tree is only a couple of threshold compares; show them, since that is
+    # exactly what app.py's walk_tree evaluates per request instead of calling sklearn
+    if hasattr(model, 'tree_'):
+        print("\nLearned decision rules:")
+        print(export_text(model, feature_names=feature_names))
+
+    # Plain float array, no DataFrame: drop the stored names like app.py does so sklearn
+    # doesn't warn about the missing column labels
+    if hasattr(model, 'feature_names_in_'):
+        del model.feature_names_in_
+    predictions = model.predict(np.asarray(test_data, dtype=np.float32))
     
     print("\nPredictions:")
     for i, pred in enumerate(predictions):